@@ -1,11 +1,13 @@
 import wave
 import os
+import sys
 import numpy as np
 from typing import Tuple, Optional
 from libs.lsb import LSBCodingStego
 from libs.phase import PhaseCodingStego
 from libs.dsss import Dsss
 from libs.echo import EchoStego
+from libs.stream import read_pcm_blocks, write_pcm_blocks
 
 
 import argparse
@@ -28,16 +30,88 @@ def main():
     encode_parser.add_argument("--outfile", required=True)
     encode_parser.add_argument("--method", choices=["lsb", "phase","dsss","echo"], required=True)
     encode_parser.add_argument("--msg", required=True)
+    encode_parser.add_argument("--framed", action="store_true", help="Sync-marker frames (dsss, echo)")
+    encode_parser.add_argument("--index", help="Write a sidecar seek index (with --framed)")
+    encode_parser.add_argument("--frame-size", type=int, help="Payload bytes per frame (with --framed)")
+    encode_parser.add_argument("--adaptive", action="store_true", help="Multi-bit adaptive LSB (lsb)")
 
     decode_parser = subparsers.add_parser("decode")
     decode_parser.add_argument("--infile", required=True)
     decode_parser.add_argument("--len", type=int, help="Required for phase method")
     decode_parser.add_argument("--method", choices=["lsb", "phase","dsss","echo"], required=True)
+    decode_parser.add_argument("--framed", action="store_true", help="Sync-marker frames (dsss, echo)")
+    decode_parser.add_argument("--index", help="Seek index written by encode --framed")
+    decode_parser.add_argument("--start", type=int, help="Resume from this sample (with --framed)")
+    decode_parser.add_argument("--frame", type=int, help="Read only this frame (needs --index)")
+    decode_parser.add_argument("--frame-size", type=int, help="Max payload bytes per frame (with --framed)")
+    decode_parser.add_argument("--adaptive", action="store_true", help="Multi-bit adaptive LSB (lsb)")
+
+    # Потоковый режим: сырой PCM int16 из stdin, результат в stdout
+    stream_encode_parser = subparsers.add_parser("stream-encode")
+    stream_encode_parser.add_argument("--method", choices=["dsss","echo"], required=True)
+    stream_encode_parser.add_argument("--msg", required=True)
+    stream_encode_parser.add_argument("--channels", type=int, default=1)
+    stream_encode_parser.add_argument("--block", type=int, default=1024, help="Frames per read")
+    stream_encode_parser.add_argument("--frame-size", type=int, help="Payload bytes per frame")
+
+    stream_decode_parser = subparsers.add_parser("stream-decode")
+    stream_decode_parser.add_argument("--method", choices=["dsss","echo"], required=True)
+    stream_decode_parser.add_argument("--channels", type=int, default=1)
+    stream_decode_parser.add_argument("--block", type=int, default=1024, help="Frames per read")
+    stream_decode_parser.add_argument("--frame-size", type=int, help="Max payload bytes per frame")
     args = parser.parse_args()
 
-    if args.command == "encode":
+    framed_methods = ["dsss","echo"]
+
+    # Параметры, которые имеют смысл только вместе с --framed
+    framed_options = []
+    if args.command in ["encode", "decode"]:
+        for name, value in [("--index", args.index), ("--frame-size", args.frame_size),
+                            ("--start", getattr(args, "start", None)), ("--frame", getattr(args, "frame", None))]:
+            if value is not None:
+                framed_options.append(name)
+        if framed_options and not args.framed and not args.adaptive:
+            parser.error(f"{', '.join(framed_options)} requires --framed")
+
+    if args.command in ["encode", "decode"] and args.adaptive:
+        if args.method != "lsb":
+            parser.error("--adaptive is supported only for lsb")
+        start = getattr(args, "start", None)
+        frame = getattr(args, "frame", None)
+        if (args.framed or args.index is not None or args.frame_size is not None
+                or start is not None or frame is not None):
+            parser.error("--adaptive cannot be combined with --framed, --index, --frame-size, --start or --frame")
+
+    if args.command == "encode" and args.adaptive:
+        method = methods[args.method]()
+        result,info = method.encode_adaptive(args.infile,args.outfile,args.msg)
+        print(info)
+
+    elif args.command == "decode" and args.adaptive:
+        method = methods[args.method]()
+        result, info = method.decode_adaptive(args.infile)
+        print(info)
+
+    elif args.command == "encode":
+        method = methods[args.method]()
+        if args.framed:
+            if args.method not in framed_methods:
+                parser.error("--framed is supported only for dsss and echo")
+            kwargs = {} if args.frame_size is None else {"frame_size": args.frame_size}
+            result,info = method.encode_framed(args.infile,args.outfile,args.msg,args.index,**kwargs)
+        else:
+            result,info = method.encode(args.infile,args.outfile,args.msg)
+        print(info)
+
+    elif args.command == "decode" and args.framed:
+        if args.method not in framed_methods:
+            parser.error("--framed is supported only for dsss and echo")
+        if args.frame is not None and args.index is None:
+            parser.error("--frame requires --index")
+
         method = methods[args.method]()
-        result,info = method.encode(args.infile,args.outfile,args.msg)
+        kwargs = {} if args.frame_size is None else {"frame_size": args.frame_size}
+        result, info = method.decode_framed(args.infile, args.index, args.start or 0, args.frame, **kwargs)
         print(info)
 
     elif args.command == "decode":
@@ -54,5 +128,18 @@ def main():
         
         print(info)
 
+    elif args.command == "stream-encode":
+        method = methods[args.method]()
+        blocks = read_pcm_blocks(sys.stdin.buffer, args.channels, args.block)
+        kwargs = {} if args.frame_size is None else {"frame_size": args.frame_size}
+        write_pcm_blocks(method.encode_stream(blocks, args.msg, **kwargs), sys.stdout.buffer)
+
+    elif args.command == "stream-decode":
+        method = methods[args.method]()
+        blocks = read_pcm_blocks(sys.stdin.buffer, args.channels, args.block)
+        kwargs = {} if args.frame_size is None else {"frame_size": args.frame_size}
+        for message in method.decode_stream(blocks, **kwargs):
+            print(message, flush=True)
+
 if __name__ == "__main__":
     main()
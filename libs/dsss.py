@@ -1,6 +1,10 @@
 from libs.abstract import StegoMethod
+from libs.stream import rechunk, read_wav_blocks, open_wav
+from libs.framing import (SYNC_MARKER, FRAME_SIZE, frame_bits, split_frames, FrameReader, FrameAssembler,
+                          build_index, write_index, read_index, decode_indexed)
 import numpy as np
 from scipy.io import wavfile
+from scipy.signal import correlate
 
 
 class Dsss(StegoMethod):
@@ -126,6 +130,162 @@ class Dsss(StegoMethod):
         return True,''.join(chr(i) if i>0 and i<127 else "*" for i in chars)
 
 
-
-
-
+    def encode_stream(self, blocks, message, L=1024, alpha=0.001, password='password',
+                      frame_size=FRAME_SIZE):
+        """
+        Потоковое встраивание: сообщение повторяется кадрами по frame_size
+        байт, каждый блок из L отсчетов несет один бит. Задержка ровно L отсчетов.
+        """
+        bits = frame_bits(message.encode('utf-8'), frame_size)
+        r = Dsss._prng(password, L)
+
+        for i, block in enumerate(rechunk(blocks, L)):
+            if len(block) < L:
+                # Хвост потока короче бита, отдаем как есть
+                yield block
+                continue
+
+            audio = block.reshape(L, -1).astype(np.float32) / 32768.0
+            mono = audio.mean(axis=1)
+
+            bit = bits[i % len(bits)]
+            power = Dsss._set_power(mono, 1, L, r, alpha)
+            mark = (2*bit - 1) * power * alpha * r
+
+            stego = audio + mark[:, None]
+            output = np.clip(np.round(stego * 32768), -32768, 32767).astype(np.int16)
+            yield output.reshape(block.shape)
+
+
+    def decode_stream(self, blocks, L=1024, password='password', frame_size=FRAME_SIZE):
+        """
+        Потоковое извлечение с любого места. Пока фаза не захвачена, биты
+        декодируются сразу для всех L сдвигов; фаза фиксируется только по
+        первому целому кадру (синхрослово + контрольная сумма). Если потом
+        кадр не сошелся или кадров нет дольше двух длин кадра (например,
+        потерялись отсчеты), захват начинается заново.
+        """
+        r = Dsss._prng(password, L)
+        sync = int(''.join(str(b) for b in SYNC_MARKER), 2)
+        mask = (1 << len(SYNC_MARKER)) - 1
+        assembler = FrameAssembler()
+        buf = np.zeros(0, dtype=np.float32)
+
+        reader = None
+        windows = np.zeros(L, dtype=np.int64)
+        candidates = {}
+
+        for block in blocks:
+            mono = block.reshape(len(block), -1).astype(np.float32).mean(axis=1) / 32768.0
+            buf = np.concatenate([buf, mono])
+
+            # Поиск фазы: бит для каждого сдвига p одной корреляцией
+            while reader is None and len(buf) >= 2 * L:
+                bits = correlate(buf[:2*L - 1], r, mode='valid', method='fft') >= 0
+                windows = ((windows << 1) | bits) & mask
+
+                found = None
+                for p in list(candidates):
+                    frame = candidates[p].push(bits[p])
+                    if frame is not None:
+                        found = p, frame
+                        break
+                    if candidates[p].body is None:
+                        # Кадр не сошелся, сдвиг p ложный
+                        del candidates[p]
+
+                for p in np.nonzero(windows == sync)[0]:
+                    if p not in candidates:
+                        candidates[p] = FrameReader(frame_size)
+                        for bit in SYNC_MARKER:
+                            candidates[p].push(bit)
+
+                buf = buf[L:]
+                if found is None:
+                    continue
+
+                p, frame = found
+                reader = candidates[p]
+                buf = buf[p:]
+                windows[:] = 0
+                candidates = {}
+                since_frame = 0
+                frame_len = len(SYNC_MARKER) + 8 * (4 + len(frame[2]))
+                message = assembler.add(frame)
+                if message is not None:
+                    yield message.decode('utf-8', errors='replace')
+
+            # Фаза захвачена: один бит на L отсчетов
+            while reader is not None and len(buf) >= L:
+                errors = reader.errors
+                frame = reader.push(buf[:L] @ r >= 0)
+                buf = buf[L:]
+                since_frame += 1
+
+                if frame is not None:
+                    since_frame = 0
+                    frame_len = max(frame_len, len(SYNC_MARKER) + 8 * (4 + len(frame[2])))
+                    message = assembler.add(frame)
+                    if message is not None:
+                        yield message.decode('utf-8', errors='replace')
+                elif reader.errors > errors or since_frame > 2 * frame_len:
+                    reader = None
+
+
+    def _span_bits(self, audio, L, password='password'):
+        # audio выровнено по границе бита
+        r = Dsss._prng(password, L)
+        N = len(audio) // L
+        return (audio[:N*L].reshape(N, L) @ r) >= 0
+
+
+    def encode_framed(self, audio_path, output_path, message, index_path=None, L=1024,
+                      frame_size=FRAME_SIZE):
+        """
+        Встраивание кадрами по всему файлу (все каналы). С index_path рядом
+        пишется индекс смещений кадров для произвольного доступа.
+        """
+        rate, audio = wavfile.read(audio_path)
+        if audio.dtype != np.int16:
+            raise ValueError("Only 16-bit PCM WAV files are supported")
+
+        frames = split_frames(message.encode('utf-8'), frame_size)
+        entries = build_index(frames, L, len(audio))
+        required = sum(len(f) for f in frames)
+        if sum(e["bits"] for e in entries) < required:
+            raise ValueError(f"Audio file too short. Need {required * L} samples, have {len(audio)}.")
+
+        blocks = (audio[i:i+L] for i in range(0, len(audio), L))
+        stego = np.concatenate(list(self.encode_stream(blocks, message, L=L, frame_size=frame_size)))
+        wavfile.write(output_path, rate, stego)
+
+        if index_path is not None:
+            write_index(index_path, entries, L, frame_size)
+        return True, f'{len(frames)} frames'
+
+
+    def decode_framed(self, audio_path, index_path=None, start=0, seq=None, frame_size=FRAME_SIZE):
+        """
+        Извлечение с отсчета start. С индексом читаются только нужные кадры
+        (seq - один кадр), без индекса файл читается блоками до первого
+        собранного сообщения.
+        """
+        try:
+            with open_wav(audio_path) as song:
+                n_frames = song.getnframes()
+        except ValueError as e:
+            return False, str(e)
+        if not 0 <= start < n_frames:
+            return False, f"Начальный отсчет {start} вне файла (0..{n_frames - 1})"
+
+        if index_path is not None:
+            ok, data = decode_indexed(audio_path, read_index(index_path), self._span_bits, start, seq)
+            if not ok:
+                return False, "Кадр не найден"
+            return True, data.decode('utf-8', errors='replace')
+
+        if seq is not None:
+            raise ValueError("Reading a single frame requires an index")
+        for message in self.decode_stream(read_wav_blocks(audio_path, start), frame_size=frame_size):
+            return True, message
+        return False, "Сообщение не найдено"
@@ -1,8 +1,12 @@
 from libs.abstract import StegoMethod
+from libs.stream import read_wav_blocks, open_wav
+from libs.framing import (SYNC_MARKER, frame_bits, split_frames, FrameReader, FrameAssembler,
+                          build_index, write_index, read_index, decode_indexed)
 import numpy as np
 from scipy.io import wavfile
 from scipy.signal import lfilter
 import struct
+from collections import deque
 import os
 
 class EchoStego(StegoMethod):
@@ -131,15 +135,18 @@ class EchoStego(StegoMethod):
         return True,bytes.decode('utf-8')
 
     def _decode_bit(self, segment):
-        # Cepstrum analysis
+        return 1 if self._bit_margins(segment[np.newaxis, :])[0] > 0 else 0
+
+    def _bit_margins(self, segments):
+        # Cepstrum analysis for a batch of segments (one per row)
         # C = real(ifft(log(abs(fft(x)))))
 
         # Windowing
-        windowed = segment * np.hamming(len(segment))
+        windowed = segments * np.hamming(segments.shape[1])
 
-        spectrum = np.fft.fft(windowed)
+        spectrum = np.fft.fft(windowed, axis=1)
         log_spectrum = np.log(np.abs(spectrum) + 1e-10) # Add small epsilon
-        cepstrum = np.fft.ifft(log_spectrum).real
+        cepstrum = np.fft.ifft(log_spectrum, axis=1).real
 
         # Check peaks at delay_0 and delay_1
         # We look at the range around the expected delays
@@ -148,7 +155,177 @@ class EchoStego(StegoMethod):
         # to account for potential jitter or broad peaks
         window = 2
 
-        val0 = np.max(cepstrum[self.delay_0 - window : self.delay_0 + window + 1])
-        val1 = np.max(cepstrum[self.delay_1 - window : self.delay_1 + window + 1])
-
-        return 1 if val1 > val0 else 0
\ No newline at end of file
+        val0 = np.max(cepstrum[:, self.delay_0 - window : self.delay_0 + window + 1], axis=1)
+        val1 = np.max(cepstrum[:, self.delay_1 - window : self.delay_1 + window + 1], axis=1)
+
+        # Positive margin means bit 1
+        return val1 - val0
+
+    def encode_stream(self, blocks, message, echo_amplitude=0.3, frame_size=4):
+        """
+        Streaming embedding for blocks of any size. Echo only needs past
+        samples, so each block is returned right away with no added latency.
+        Echo carries only ~12 bit/s at 48 kHz, hence the small default frames.
+        Live echo decoding suits only short payloads on favourable (speech,
+        broadband) covers; on tonal material about 20% of bits are wrong.
+        """
+        bits = frame_bits(message.encode('utf-8'), frame_size)
+        delays = np.where(bits == 1, self.delay_1, self.delay_0)
+        max_delay = max(self.delay_0, self.delay_1)
+        # Short fade-in at each segment start instead of the full-segment ramp
+        # of encode(): a stronger echo keeps live decoding reliable
+        fade = np.minimum(1, np.arange(self.segment_len) / self.transition_len)
+
+        history = None
+        pos = 0
+
+        for block in blocks:
+            audio = block.reshape(len(block), -1).astype(np.float32) / 32768.0
+            if history is None:
+                history = np.zeros((max_delay, audio.shape[1]), dtype=np.float32)
+
+            # As in encode(), the echo does not cross segment boundaries
+            idx = pos + np.arange(len(audio))
+            seg_pos = idx % self.segment_len
+            delay = delays[(idx // self.segment_len) % len(delays)]
+            gain = np.where(seg_pos >= delay, echo_amplitude * fade[seg_pos], 0)
+
+            ext = np.concatenate([history, audio])
+            echo = ext[max_delay + np.arange(len(audio)) - delay]
+            mixed = audio + gain[:, np.newaxis] * echo
+
+            history = ext[-max_delay:]
+            pos += len(audio)
+
+            output = np.clip(np.round(mixed * 32768), -32768, 32767).astype(np.int16)
+            yield output.reshape(block.shape)
+
+    def decode_stream(self, blocks, lock_step=64, frame_size=4, lock_window=32):
+        """
+        Streaming extraction from any point. Until the first valid frame,
+        every candidate segment boundary (each lock_step samples) is decoded
+        in parallel; the candidate that yields it becomes the lock (ties go to
+        the most confident candidate over the last lock_window segments). A rejected
+        frame, or no frame for two frame lengths (e.g. lost samples), drops
+        back to the search, which replays the last frame length of audio.
+        Reliable only for short payloads on favourable covers, see encode_stream.
+        """
+        offsets = np.arange(0, self.segment_len, lock_step)
+        assembler = FrameAssembler()
+        reader = None
+        readers = None
+        buf = np.zeros(0, dtype=np.float32)
+
+        for block in blocks:
+            mono = block.reshape(len(block), -1).astype(np.float32).mean(axis=1) / 32768.0
+            buf = np.concatenate([buf, mono])
+
+            while reader is None and len(buf) >= 2 * self.segment_len:
+                if readers is None:
+                    readers = [FrameReader(frame_size) for _ in offsets]
+                    recent = np.zeros((lock_window, len(offsets)))
+                    step = 0
+
+                segments = np.stack([buf[o:o + self.segment_len] for o in offsets])
+                buf = buf[self.segment_len:]
+                margins = self._bit_margins(segments)
+                recent[step % lock_window] = np.abs(margins)
+                step += 1
+
+                found = {}
+                for k, margin in enumerate(margins):
+                    frame = readers[k].push(1 if margin > 0 else 0)
+                    if frame is not None:
+                        found[k] = frame
+                if not found:
+                    continue
+
+                # Boundaries half a segment off can pass too; the true one
+                # gives the most confident decisions
+                confidence = recent.sum(axis=0)
+                k = max(found, key=lambda k: confidence[k])
+                reader = readers[k]
+                readers = None
+                buf = buf[offsets[k]:]
+                since_frame = 0
+                frame_len = len(SYNC_MARKER) + 8 * (4 + len(found[k][2]))
+                history = deque(maxlen=frame_len)
+                message = assembler.add(found[k])
+                if message is not None:
+                    yield message.decode('utf-8', errors='replace')
+
+            # Locked: one bit per segment
+            while reader is not None and len(buf) >= self.segment_len:
+                errors = reader.errors
+                frame = reader.push(1 if self._bit_margins(buf[np.newaxis, :self.segment_len])[0] > 0 else 0)
+                history.append(buf[:self.segment_len])
+                buf = buf[self.segment_len:]
+                since_frame += 1
+
+                if frame is not None:
+                    since_frame = 0
+                    frame_len = max(frame_len, len(SYNC_MARKER) + 8 * (4 + len(frame[2])))
+                    message = assembler.add(frame)
+                    if message is not None:
+                        yield message.decode('utf-8', errors='replace')
+                elif reader.errors > errors or since_frame > 2 * frame_len:
+                    # Search again from the last frame length of audio, so a
+                    # frame already in progress is not lost
+                    reader = None
+                    buf = np.concatenate(list(history) + [buf])
+
+    def _span_bits(self, audio, segment_len):
+        # audio is aligned to a segment boundary
+        N = len(audio) // segment_len
+        segments = audio[:N*segment_len].reshape(N, segment_len)
+        return (self._bit_margins(segments) > 0).astype(int)
+
+    def encode_framed(self, cover_path, output_path, data, index_path=None, echo_amplitude=0.3,
+                      frame_size=4):
+        """
+        Embed frames over the whole file (all channels). With index_path a
+        sidecar index of frame offsets is written for random access.
+        """
+        rate, audio = wavfile.read(cover_path)
+        if audio.dtype != np.int16:
+            raise ValueError("Only 16-bit PCM WAV files are supported")
+
+        frames = split_frames(data.encode('utf-8'), frame_size)
+        entries = build_index(frames, self.segment_len, len(audio))
+        required = sum(len(f) for f in frames)
+        if sum(e["bits"] for e in entries) < required:
+            raise ValueError(f"Audio file too short. Need {required * self.segment_len} samples, have {len(audio)}.")
+
+        blocks = (audio[i:i+self.segment_len] for i in range(0, len(audio), self.segment_len))
+        stego = np.concatenate(list(self.encode_stream(blocks, data, echo_amplitude, frame_size)))
+        wavfile.write(output_path, rate, stego)
+
+        if index_path is not None:
+            write_index(index_path, entries, self.segment_len, frame_size)
+        return True, f'{len(frames)} frames'
+
+    def decode_framed(self, stego_path, index_path=None, start=0, seq=None, frame_size=4):
+        """
+        Extract starting at sample start. With an index only the needed frames
+        are read (seq selects a single frame); without it the file is read
+        block by block until the first complete message.
+        """
+        try:
+            with open_wav(stego_path) as song:
+                n_frames = song.getnframes()
+        except ValueError as e:
+            return False, str(e)
+        if not 0 <= start < n_frames:
+            return False, f"Start sample {start} is outside the file (0..{n_frames - 1})"
+
+        if index_path is not None:
+            ok, data = decode_indexed(stego_path, read_index(index_path), self._span_bits, start, seq)
+            if not ok:
+                return False, "Frame not found"
+            return True, data.decode('utf-8', errors='replace')
+
+        if seq is not None:
+            raise ValueError("Reading a single frame requires an index")
+        for message in self.decode_stream(read_wav_blocks(stego_path, start), frame_size=frame_size):
+            return True, message
+        return False, "No complete message found"
@@ -0,0 +1,215 @@
+import json
+from collections import deque
+import numpy as np
+
+from libs.stream import read_wav_span
+
+
+# Sync word that starts every frame
+SYNC_MARKER = np.array([1, 1, 1, 1, 1, 0, 0, 1, 1, 0, 1, 0, 1, 1, 0, 0], dtype=np.int8)
+
+# Payload bytes per frame
+FRAME_SIZE = 16
+
+
+def split_frames(data: bytes, frame_size=FRAME_SIZE):
+    """
+    Режет сообщение на самосинхронизирующиеся кадры:
+    SYNC_MARKER, номер кадра, число кадров, длина, данные, контрольная сумма
+    (по 8 бит на каждое поле заголовка). Возвращает список массивов бит.
+    """
+    if len(data) == 0:
+        raise ValueError("Empty message")
+    if not 1 <= frame_size <= 255:
+        raise ValueError("Frame size must be 1..255 bytes")
+
+    total = (len(data) + frame_size - 1) // frame_size
+    if total > 255:
+        raise ValueError("Message needs more than 255 frames")
+
+    frames = []
+    for seq in range(total):
+        payload = data[seq*frame_size:(seq + 1)*frame_size]
+        body = bytes([seq, total, len(payload)]) + payload
+        body += bytes([sum(body) & 0xFF])
+        body_bits = np.unpackbits(np.frombuffer(body, dtype=np.uint8)).astype(np.int8)
+        frames.append(np.concatenate([SYNC_MARKER, body_bits]))
+    return frames
+
+
+def frame_bits(data: bytes, frame_size=FRAME_SIZE):
+    """
+    Все кадры сообщения подряд, одним массивом бит
+    """
+    return np.concatenate(split_frames(data, frame_size))
+
+
+class FrameReader:
+    """
+    Собирает кадры из потока бит, начиная с любого места
+    """
+
+    def __init__(self, frame_size=FRAME_SIZE):
+        """
+        Args:
+            frame_size: Максимальная длина данных в кадре (как у кодера);
+                        заголовок с большей длиной считается ложным
+        """
+        self.frame_size = frame_size
+        self.window = 0
+        self.sync = int(''.join(str(b) for b in SYNC_MARKER), 2)
+        self.mask = (1 << len(SYNC_MARKER)) - 1
+        self.body = None
+        self.need = 0
+        self.total = None  # Число кадров по уже принятым кадрам
+        self.ready = deque()
+        self.errors = 0  # Кадры, отброшенные после синхрослова
+
+    def push(self, bit):
+        """
+        Добавляет один бит. Возвращает кадр (seq, total, payload), если он
+        собран и контрольная сумма совпала, иначе None.
+        """
+        queue = deque([int(bit) & 1])
+        while queue:
+            frame = self._step(queue.popleft(), queue)
+            if frame is not None:
+                self.ready.append(frame)
+        return self.ready.popleft() if self.ready else None
+
+    def _step(self, bit, queue):
+        if self.body is None:
+            self.window = ((self.window << 1) | bit) & self.mask
+            if self.window == self.sync:
+                self.body = []
+                self.need = 24
+            return None
+
+        self.body.append(bit)
+        if len(self.body) == 24 and self.need == 24:
+            seq, total, length = (int(x) for x in np.packbits(self.body))
+            if (length == 0 or length > self.frame_size or seq >= total
+                    or (self.total is not None and total != self.total)):
+                self._reject(queue)
+                return None
+            self.need = 8 * (3 + length + 1)
+        if len(self.body) < self.need:
+            return None
+
+        data = np.packbits(self.body).tobytes()
+        if sum(data[:-1]) & 0xFF != data[-1]:
+            self._reject(queue)
+            return None
+        self._reset()
+        self.total = data[1]
+        return data[0], data[1], data[3:-1]
+
+    def _reject(self, queue):
+        # Синхрослово могло быть ложным: ищем настоящее в уже прочитанных битах
+        self.errors += 1
+        queue.extendleft(reversed([int(b) for b in SYNC_MARKER[1:]] + self.body))
+        self._reset()
+
+    def _reset(self):
+        self.window = 0
+        self.body = None
+        self.need = 0
+
+
+class FrameAssembler:
+    """
+    Складывает кадры по номерам, пока сообщение не соберется целиком
+    """
+
+    def __init__(self):
+        self.parts = {}
+        self.total = None
+
+    def add(self, frame):
+        """
+        Возвращает байты сообщения, когда собраны все кадры, иначе None
+        """
+        seq, total, payload = frame
+        if total != self.total:
+            self.parts = {}
+            self.total = total
+
+        self.parts[seq] = payload
+        if len(self.parts) < total:
+            return None
+
+        data = b''.join(self.parts[i] for i in range(total))
+        self.parts = {}
+        return data
+
+
+def build_index(frames, samples_per_bit, total_samples):
+    """
+    Смещения (в отсчетах) всех кадров, которые целиком помещаются в аудио.
+    Кадры повторяются по кругу, как их пишет encode_stream.
+    """
+    entries = []
+    offset = 0
+    i = 0
+    while True:
+        bits = len(frames[i % len(frames)])
+        if offset + bits * samples_per_bit > total_samples:
+            break
+        entries.append({"offset": offset, "seq": i % len(frames), "bits": bits})
+        offset += bits * samples_per_bit
+        i += 1
+    return entries
+
+
+def write_index(path, entries, samples_per_bit, frame_size=FRAME_SIZE):
+    with open(path, 'w') as f:
+        json.dump({"samples_per_bit": samples_per_bit, "frame_size": frame_size,
+                   "frames": entries}, f)
+
+
+def read_index(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def decode_indexed(audio_path, index, span_bits, start=0, seq=None):
+    """
+    Декодирование по индексу: читаются только отрезки нужных кадров.
+
+    Args:
+        span_bits: функция (моно-отсчеты, samples_per_bit) -> биты,
+                   отсчеты выровнены по началу кадра
+        start: пропустить кадры, начинающиеся раньше этого отсчета
+        seq: вернуть только кадр с этим номером
+
+    Returns:
+        Tuple[bool, bytes]: (успех, данные кадра или сообщения)
+    """
+    samples_per_bit = index["samples_per_bit"]
+    frame_size = index.get("frame_size", FRAME_SIZE)
+    assembler = FrameAssembler()
+
+    for entry in index["frames"]:
+        if entry["offset"] < start:
+            continue
+        if seq is not None and entry["seq"] != seq:
+            continue
+
+        block = read_wav_span(audio_path, entry["offset"], entry["bits"] * samples_per_bit)
+        mono = block.astype(np.float32).mean(axis=1) / 32768.0
+
+        reader = FrameReader(frame_size)
+        frame = None
+        for bit in span_bits(mono, samples_per_bit):
+            frame = reader.push(bit)
+        if frame is None:
+            # Поврежденная копия, пробуем следующую
+            continue
+
+        if seq is not None:
+            return True, frame[2]
+        message = assembler.add(frame)
+        if message is not None:
+            return True, message
+
+    return False, b''
@@ -10,15 +10,23 @@ class LSBCodingStego(StegoMethod):
     Класс для стеганографии в WAV-файлах с использованием LSB-метода
     """
     
-    def __init__(self, lsb_position: int = 0):
+    def __init__(self, lsb_position: int = 0, max_bits: int = 4,
+                 block_size: int = 1024, margin_bits: int = 6):
         """
         Инициализация параметров стеганографии
         
         Args:
             lsb_position: Позиция LSB (0 - младший бит, 1 - следующий и т.д.)
                          Чем выше значение, тем меньше искажений, но ниже вместимость
+            max_bits: Адаптивный режим - максимум бит на отсчет
+            block_size: Адаптивный режим - длина блока для оценки громкости
+            margin_bits: Адаптивный режим - запас (в битах) между громкостью
+                         блока и уровнем шума встраивания
         """
         self.lsb_position = lsb_position
+        self.max_bits = max_bits
+        self.block_size = block_size
+        self.margin_bits = margin_bits
         self.end_marker = "*^*^*"  # Маркер конца сообщения
 
     def _int_to_bits(self, value: int, bits: int = 32):
@@ -116,6 +124,68 @@ class LSBCodingStego(StegoMethod):
     def _uint16_to_int16(self,x):
         return x - 0x10000 if x >= 0x8000 else x
 
+    def _bit_allocation(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Число бит для каждого отсчета по громкости его блока (RMS).
+        Громкость считается без младших max_bits бит, которые меняет
+        встраивание, поэтому при декодировании таблица получается та же.
+        """
+        coarse = samples.astype(np.int32) & ~((1 << self.max_bits) - 1)
+
+        n_blocks = -(-len(coarse) // self.block_size)
+        blocks = np.zeros(n_blocks * self.block_size, dtype=np.float64)
+        blocks[:len(coarse)] = coarse
+        rms = np.sqrt(np.mean(blocks.reshape(n_blocks, self.block_size) ** 2, axis=1))
+
+        # Шум от k младших бит ~ 2^k, держим его на margin_bits ниже громкости
+        table = np.floor(np.log2(rms + 1)) - self.margin_bits
+        table = np.clip(table, 0, self.max_bits).astype(np.int32)
+
+        return np.repeat(table, self.block_size)[:len(samples)]
+
+    def _bit_matrix(self, alloc: np.ndarray):
+        """
+        Сдвиги для бит каждого отсчета (старший бит первым) и маска занятых позиций
+        """
+        j = np.arange(self.max_bits)
+        valid = j < alloc[:, None]
+        shifts = np.where(valid, alloc[:, None] - 1 - j, 0)
+        return shifts, valid
+
+    def _embed_bits_adaptive(self, samples: np.ndarray, bits: np.ndarray, alloc: np.ndarray) -> np.ndarray:
+        """
+        Замена alloc[i] младших бит каждого отсчета битами сообщения, целым массивом
+        """
+        ends = np.cumsum(alloc)
+        n = int(np.searchsorted(ends, len(bits))) + 1
+        k = alloc[:n]
+
+        padded = np.zeros(ends[n - 1], dtype=np.int32)
+        padded[:len(bits)] = bits
+
+        shifts, valid = self._bit_matrix(k)
+        idx = (ends[:n] - k)[:, None] + np.arange(self.max_bits)
+        idx = np.minimum(idx, len(padded) - 1)
+        values = np.sum(np.where(valid, padded[idx] << shifts, 0), axis=1)
+
+        out = samples.astype(np.int32)
+        mask = (1 << k) - 1
+        out[:n] = (out[:n] & ~mask) | values
+        return out.astype(np.int16)
+
+    def _extract_bits_adaptive(self, samples: np.ndarray, alloc: np.ndarray, count: int):
+        """
+        Первые count бит, встроенных по таблице alloc, или None, если их столько нет
+        """
+        ends = np.cumsum(alloc)
+        if len(ends) == 0 or ends[-1] < count:
+            return None
+        n = int(np.searchsorted(ends, count)) + 1
+
+        shifts, valid = self._bit_matrix(alloc[:n])
+        bits = (samples[:n].astype(np.int32)[:, None] >> shifts) & 1
+        return bits[valid][:count].astype(np.uint8)
+
 
 
 
@@ -249,3 +319,88 @@ class LSBCodingStego(StegoMethod):
 
         except Exception as e:
             return False, f"Ошибка при декодировании: {str(e)}"
+
+    def encode_adaptive(self, input_file: str, output_file: str, message: str) -> Tuple[bool, str]:
+        """
+        Адаптивное кодирование: в громких блоках в каждый отсчет встраивается
+        до max_bits бит, в тихих меньше или ничего
+        
+        Args:
+            input_file: Путь к исходному аудиофайлу
+            output_file: Путь для сохранения файла со скрытым сообщением
+            message: Сообщение для сокрытия
+            
+        Returns:
+            Tuple[bool, str]: (успех, сообщение об ошибке/успехе)
+        """
+        try:
+            with wave.open(input_file, 'rb') as song:
+                params = song.getparams()
+                n_frames = song.getnframes()
+                frames = song.readframes(n_frames)
+
+            samples = np.frombuffer(frames, dtype=np.int16)
+
+            message_bytes = message.encode("utf-8")
+            length_bits = np.array(self._int_to_bits(len(message_bytes), 32), dtype=np.uint8)
+            data_bits = np.unpackbits(np.frombuffer(message_bytes, dtype=np.uint8))
+            message_bits = np.concatenate([length_bits, data_bits])
+
+            alloc = self._bit_allocation(samples)
+            capacity = int(alloc.sum())
+
+            if capacity < len(message_bits):
+                raise ValueError("Сообщение слишком большое")
+
+            samples = self._embed_bits_adaptive(samples, message_bits, alloc)
+
+            with wave.open(output_file, 'wb') as out:
+                out.setparams(params)
+                out.writeframes(samples.tobytes())
+
+            used = len(message_bytes)
+            usage_percent = (len(message_bits) / capacity) * 100
+
+            return True, (
+                f"Сообщение успешно скрыто!\n"
+                f"Файл сохранен: {output_file}\n"
+                f"Размер сообщения: {used} байт\n"
+                f"Использовано емкости: {usage_percent:.2f}%\n"
+                f"Емкость: {capacity // 8} байт, в среднем {capacity / len(samples):.2f} бит на отсчет"
+            )
+
+        except Exception as e:
+            return False, f"Ошибка при кодировании: {str(e)}"
+
+    def decode_adaptive(self, input_file: str) -> Tuple[bool, str]:
+        try:
+            with wave.open(input_file, 'rb') as song:
+                n_frames = song.getnframes()
+                frames = song.readframes(n_frames)
+
+            samples = np.frombuffer(frames, dtype=np.int16)
+            alloc = self._bit_allocation(samples)
+
+            # 1) Сначала 32 бита длины
+            length_bits = self._extract_bits_adaptive(samples, alloc, 32)
+            if length_bits is None:
+                return False, "Не удалось извлечь длину сообщения"
+
+            msg_length = self._bits_to_int(length_bits.tolist())  # длина в байтах
+
+            # 2) Затем длина и сообщение целиком
+            all_bits = self._extract_bits_adaptive(samples, alloc, 32 + msg_length * 8)
+            if all_bits is None:
+                return False, "Не удалось извлечь все биты сообщения"
+
+            message_bytes = np.packbits(all_bits[32:]).tobytes()
+
+            try:
+                message = message_bytes.decode("utf-8")
+            except UnicodeDecodeError:
+                return False, "Сообщение извлечено, но не удалось декодировать UTF-8"
+
+            return True, message
+
+        except Exception as e:
+            return False, f"Ошибка при декодировании: {str(e)}"
@@ -0,0 +1,91 @@
+import wave
+import numpy as np
+
+
+def read_pcm_blocks(stream, channels=1, block_size=1024):
+    """
+    Читает сырой PCM (int16 little-endian, каналы чередуются) из бинарного
+    потока блоками формы (block_size, channels)
+    """
+    frame_bytes = 2 * channels
+    rest = b''
+    while True:
+        data = stream.read(block_size * frame_bytes)
+        if not data:
+            break
+        data = rest + data
+        usable = len(data) - len(data) % frame_bytes
+        rest = data[usable:]
+        if usable:
+            yield np.frombuffer(data[:usable], dtype='<i2').reshape(-1, channels)
+
+
+def open_wav(path):
+    """
+    Открывает WAV на чтение, допускается только 16-битный PCM
+    """
+    song = wave.open(path, 'rb')
+    if song.getsampwidth() != 2:
+        song.close()
+        raise ValueError("Only 16-bit PCM WAV files are supported")
+    return song
+
+
+def read_wav_blocks(path, start=0, block_size=1024):
+    """
+    Читает WAV блоками начиная с отсчета start, не загружая весь файл
+    """
+    with open_wav(path) as song:
+        channels = song.getnchannels()
+        if not 0 <= start < song.getnframes():
+            raise ValueError(f"Start sample {start} is outside the file")
+        song.setpos(start)
+        while True:
+            frames = song.readframes(block_size)
+            if not frames:
+                break
+            yield np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+
+
+def read_wav_span(path, start, count):
+    """
+    Читает из WAV только отрезок [start, start + count)
+    """
+    with open_wav(path) as song:
+        channels = song.getnchannels()
+        if not 0 <= start < song.getnframes():
+            raise ValueError(f"Start sample {start} is outside the file")
+        song.setpos(start)
+        frames = song.readframes(count)
+    return np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+
+
+def write_pcm_blocks(blocks, stream):
+    """
+    Пишет блоки int16 в бинарный поток сразу после обработки
+    """
+    for block in blocks:
+        stream.write(np.ascontiguousarray(block, dtype='<i2').tobytes())
+        stream.flush()
+
+
+def rechunk(blocks, size):
+    """
+    Перенарезает поток блоков произвольной длины на блоки ровно по size отсчетов.
+    Последний блок может быть короче.
+    """
+    pending = []
+    count = 0
+    for block in blocks:
+        pending.append(block)
+        count += len(block)
+        if count < size:
+            continue
+        data = np.concatenate(pending)
+        n = len(data) - len(data) % size
+        for start in range(0, n, size):
+            yield data[start:start + size]
+        pending = [data[n:]]
+        count = len(data) - n
+    if count:
+        yield np.concatenate(pending)